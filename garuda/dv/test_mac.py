@@ -1,7 +1,9 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
-import random
+from cocotb.triggers import FallingEdge, RisingEdge, ReadOnly, Timer
+from collections import deque
+import numpy as np
+import struct
 
 # Opcode constants from int8_mac_instr_pkg.sv
 OP_ILLEGAL  = 0
@@ -11,6 +13,9 @@ OP_MUL8     = 3
 OP_CLIP8    = 4
 OP_SIMD_DOT = 5
 
+# Cycles between driving int8_mac_unit inputs and seeing result_o (one register stage)
+PIPELINE_DEPTH = 1
+
 async def reset_dut(dut):
     dut.rst_ni.value = 0
     dut.rs1_i.value = 0
@@ -25,83 +30,103 @@ async def reset_dut(dut):
     dut.rst_ni.value = 1
     await RisingEdge(dut.clk_i)
 
+def ref_simd_dot(rs1, rs2, acc):
+    """Reference SIMD_DOT: sum of 4 byte products plus accumulator, wrapped to 32 bits"""
+    # The int32 cast gives the two's-complement truncation the RTL performs
+    return ((rs1 * rs2).sum(axis=1).astype(np.int64) + acc).astype(np.int32)
+
 def get_signed_bytes(val):
     """Extract 4 signed bytes from a 32-bit integer"""
-    bytes_list = []
-    for i in range(4):
-        byte = (val >> (i * 8)) & 0xFF
-        if byte >= 128:
-            byte -= 256
-        bytes_list.append(byte)
-    return bytes_list
+    return list(struct.unpack('<4b', (val & 0xFFFFFFFF).to_bytes(4, 'little')))
 
 @cocotb.test()
 async def test_simd_dot(dut):
     """Test SIMD Dot Product operation"""
+    num_vectors = 1000
+
+    # Generate all inputs up front: 4 signed bytes per operand, 32-bit accumulator
+    # Seeded from cocotb's RANDOM_SEED so a failing run can be reproduced
+    rng = np.random.default_rng(cocotb.RANDOM_SEED)
+    rs1 = rng.integers(-128, 128, size=(num_vectors, 4), dtype=np.int32)
+    rs2 = rng.integers(-128, 128, size=(num_vectors, 4), dtype=np.int32)
+    acc = rng.integers(-2**31, 2**31, size=num_vectors, dtype=np.int64)
+
+    # Expected model for every vector, computed once before simulation
+    expected = ref_simd_dot(rs1, rs2, acc)
+
+    # Pack bytes little-endian into 32-bit integers for the DUT
+    byte_weights = np.array([1, 1 << 8, 1 << 16, 1 << 24], dtype=np.uint32)
+    rs1_packed = (rs1.astype(np.uint32) & 0xFF).dot(byte_weights)
+    rs2_packed = (rs2.astype(np.uint32) & 0xFF).dot(byte_weights)
+
+    # Plain Python ints for signal assignment
+    rs1_vals = rs1_packed.tolist()
+    rs2_vals = rs2_packed.tolist()
+    acc_vals = acc.tolist()
+
     clock = Clock(dut.clk_i, 10, units="ns")
     cocotb.start_soon(clock.start())
 
     await reset_dut(dut)
+
+    # Look up handles and the clock trigger once instead of on every access
+    clk_fall = FallingEdge(dut.clk_i)
+    rs1_h = dut.rs1_i
+    rs2_h = dut.rs2_i
+    rd_h = dut.rd_i
+    op_h = dut.opcode_i
+    result_h = dut.result_o
+    valid_h = dut.valid_o
     
-    # Run 1000 random vectors
-    for i in range(1000):
-        # Generate inputs
-        rs1_bytes = [random.randint(-128, 127) for _ in range(4)]
-        rs2_bytes = [random.randint(-128, 127) for _ in range(4)]
-        acc_val = random.randint(-2147483648, 2147483647)
-        
-        # Pack into 32-bit integers
-        rs1_val = 0
-        rs2_val = 0
-        for b_idx in range(4):
-            rs1_val |= (rs1_bytes[b_idx] & 0xFF) << (b_idx*8)
-            rs2_val |= (rs2_bytes[b_idx] & 0xFF) << (b_idx*8)
-            
+    # Outputs are only recorded during simulation and checked after the run
+    raw_results = np.empty(num_vectors, dtype=np.int64)
+    valids = np.empty(num_vectors, dtype=np.uint8)
+    
+    def sample(j):
+        raw_results[j] = int(result_h.value)
+        valids[j] = int(valid_h.value)
+
+    # Pipelined driver: a new vector is issued every cycle.
+    # Inputs are written immediately on the falling edge, half a cycle away from
+    # the rising edge where always_ff captures result_comb, so the value visible
+    # in ReadOnly belongs to the vector that was driven in the previous cycle.
+    pending = deque()
+    await clk_fall
+    for i in range(num_vectors):
         # Drive DUT
-        dut.rs1_i.value = rs1_val
-        dut.rs2_i.value = rs2_val
-        dut.rd_i.value = acc_val
-        dut.opcode_i.value = OP_SIMD_DOT
+        rs1_h.setimmediatevalue(rs1_vals[i])
+        rs2_h.setimmediatevalue(rs2_vals[i])
+        rd_h.setimmediatevalue(acc_vals[i])
+        op_h.setimmediatevalue(OP_SIMD_DOT)
+        pending.append(i)
         
-        # Wait for clock edge
-        await RisingEdge(dut.clk_i)
+        # Sample the registered result of the previous vector
+        await ReadOnly()
+        if len(pending) > PIPELINE_DEPTH:
+            sample(pending.popleft())
         
-        # Wait for next clock edge to capture registered output
-        # The design registers inputs? No, it's combinational logic -> registered output
-        # Cycle 1: Inputs driven -> Logic computes -> Register inputs capture at end of cycle 1?
-        # Looking at RTL: 
-        #   always_comb calculates result_comb
-        #   always_ff captures result_comb into result_q
-        # So we drive inputs, wait for posedge, result_q updates.
-        # We can check result_o immediately after the posedge (with small delta delay provided by ReadOnly/Monitor usually)
-        # But in simple driver, await RisingEdge returns after the edge.
-        
-        # Need to wait one clock cycle for the pipeline
-        await RisingEdge(dut.clk_i) 
-        
-        # Calculate Expected Model
-        dot_product = 0
-        for b in range(4):
-            dot_product += rs1_bytes[b] * rs2_bytes[b]
-        
-        expected = dot_product + acc_val
-        
-        # Handle 32-bit overflow for python comparison
-        if expected > 2147483647:
-            expected -= 4294967296
-        elif expected < -2147483648:
-            expected += 4294967296
-            
-        # Check Output
-        got = dut.result_o.value.signed_integer
-        valid = dut.valid_o.value
-        
-        assert valid == 1, f"Output should be valid for SIMD_DOT"
-        assert got == expected, \
-            f"Iter {i}: Mismatch! rs1={rs1_bytes}, rs2={rs2_bytes}, acc={acc_val}\n" \
-            f"Expected: {expected}, Got: {got}"
+        await clk_fall
 
-    dut._log.info("SIMD_DOT verification passed (1000 vectors)")
+    # Drain the vectors still in flight
+    while pending:
+        await ReadOnly()
+        sample(pending.popleft())
+        if pending:
+            await clk_fall
+
+    # Check Output
+    invalid = np.flatnonzero(valids != 1)
+    assert invalid.size == 0, f"Iter {invalid[0]}: Output should be valid for SIMD_DOT"
+    
+    got = ((raw_results + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+    mismatches = np.flatnonzero(got != expected)
+    if mismatches.size:
+        j = mismatches[0]
+        raise AssertionError(
+            f"Iter {j}: Mismatch! rs1={get_signed_bytes(rs1_vals[j])}, rs2={get_signed_bytes(rs2_vals[j])}, acc={acc_vals[j]}\n"
+            f"Expected: {expected[j]}, Got: {got[j]} ({mismatches.size} mismatches in total)")
+
+    dut._log.info(f"SIMD_DOT verification passed ({num_vectors} vectors)")
 
 @cocotb.test()
 async def test_mac8_legacy(dut):
@@ -115,16 +140,19 @@ async def test_mac8_legacy(dut):
     rs2_byte = -5
     acc_byte = 20
     
+    clk_edge = RisingEdge(dut.clk_i)
+
     dut.rs1_i.value = rs1_byte & 0xFF
     dut.rs2_i.value = rs2_byte & 0xFF
     dut.rd_i.value = acc_byte & 0xFF
     dut.opcode_i.value = OP_MAC8
     
-    await RisingEdge(dut.clk_i)
-    await RisingEdge(dut.clk_i)
+    await clk_edge
+    await clk_edge
     
     expected = (rs1_byte * rs2_byte) + acc_byte # 10*-5 + 20 = -30
-    got = dut.result_o.value.signed_integer
+    raw = int(dut.result_o.value)
+    got = raw - 0x100000000 if raw & 0x80000000 else raw
     # Result is in lower 8 bits, sign extended?
     # RTL: result_comb = {{24{sum_9bit[7]}}, sum_9bit[7:0]};
     
@@ -0,0 +1,36 @@
+"""
+Run each cocotb test in test_mac.py in its own simulator process.
+
+Requires cocotb-test and pytest-xdist:
+    pytest -n auto test_runner.py
+"""
+
+import os
+
+import pytest
+from cocotb_test.simulator import run
+
+DV_DIR = os.path.dirname(os.path.abspath(__file__))
+RTL_DIR = os.path.join(DV_DIR, '..', 'rtl')
+
+# Same sources and top level as the cocotb Makefile in this directory
+VERILOG_SOURCES = [
+    os.path.join(RTL_DIR, 'int8_mac_instr_pkg.sv'),
+    os.path.join(RTL_DIR, 'int8_mac_unit.sv'),
+]
+
+@pytest.mark.parametrize("testcase", ["test_simd_dot", "test_mac8_legacy"])
+def test_mac(testcase):
+    # Extra args for Icarus to handle SystemVerilog features
+    compile_args = ['-g2012'] if os.environ.get('SIM', 'icarus') == 'icarus' else []
+    
+    run(
+        verilog_sources=VERILOG_SOURCES,
+        toplevel='int8_mac_unit',
+        module='test_mac',
+        testcase=testcase,
+        python_search=[DV_DIR],
+        compile_args=compile_args,
+        # Separate build directory per test so parallel workers don't collide
+        sim_build=os.path.join(DV_DIR, 'sim_build', testcase),
+    )
@@ -4,87 +4,127 @@ Extract CVA6 RTL files from Flist.cva6 for Makefile inclusion
 Works on Windows and Linux
 """
 
-import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+import posixpath
 
-def process_flist_file(flist_path, cva6_repo_dir, target_cfg, processed_flists=None):
-    """Process a Flist file and return files and include directories"""
-    if processed_flists is None:
-        processed_flists = set()
-    
-    # Normalize path to avoid processing same file twice
-    flist_path = os.path.normpath(os.path.abspath(flist_path))
-    if flist_path in processed_flists:
-        return [], []
-    processed_flists.add(flist_path)
+def flist_substitutions(cva6_repo_dir, target_cfg):
+    """Return the (variable, value) replacements applied to every Flist line"""
+    # Flist paths always use forward slashes
+    cva6_dir_fw = cva6_repo_dir.replace('\\', '/')
+    # HPDCACHE_DIR should point to hpdcache directory (without /rtl) since Flist uses ${HPDCACHE_DIR}/rtl/...
+    hpdcache_dir_fw = posixpath.join(cva6_dir_fw, 'core', 'cache_subsystem', 'hpdcache')
     
+    # Order matters - do HPDCACHE_DIR first since it contains CVA6_REPO_DIR pattern
+    return (
+        ('${HPDCACHE_DIR}', hpdcache_dir_fw),
+        ('${CVA6_REPO_DIR}', cva6_dir_fw),
+        ('${TARGET_CFG}', target_cfg),
+    )
+
+def normalize_flist_path(flist_path):
+    """Normalize a Flist path so the same file is only processed once"""
+    # (normcase so case-variant spellings of the same Flist match on Windows)
+    if not os.path.isabs(flist_path):
+        flist_path = os.path.abspath(flist_path)
+    return os.path.normcase(os.path.normpath(flist_path))
+
+def resolve_flist_ref(line, cva6_repo_dir):
+    """Return the Flist path referenced by a -F line"""
+    # Extract the Flist path (after variable replacement, paths are relative to cva6_repo_dir)
+    flist_ref = line[2:].strip()
+    # Check if it's already an absolute path (after variable replacement)
+    if not os.path.isabs(flist_ref):
+        # Relative to cva6_repo_dir
+        flist_ref = os.path.join(cva6_repo_dir, flist_ref)
+    return normalize_flist_path(flist_ref)
+
+def read_flist(flist_path, substitutions):
+    """Read a Flist and return its stripped lines with variables replaced, or None if missing"""
     if not os.path.exists(flist_path):
-        print(f"Warning: Flist not found at {flist_path}", file=sys.stderr)
-        return [], []
+        return None
     
+    lines = []
     with open(flist_path, 'r') as f:
-        content = f.read()
-    
-    # Calculate HPDCACHE_DIR before replacement
-    # HPDCACHE_DIR should point to hpdcache directory (without /rtl) since Flist uses ${HPDCACHE_DIR}/rtl/...
-    hpdcache_dir = os.path.join(cva6_repo_dir, 'core', 'cache_subsystem', 'hpdcache')
-    
-    # Replace variables (order matters - do HPDCACHE_DIR first since it contains CVA6_REPO_DIR pattern)
-    content = content.replace('${HPDCACHE_DIR}', hpdcache_dir.replace('\\', '/'))
-    content = content.replace('${CVA6_REPO_DIR}', cva6_repo_dir.replace('\\', '/'))
-    content = content.replace('${TARGET_CFG}', target_cfg)
-    
-    files = []
-    include_dirs = []
+        for line in f:
+            line = line.strip()
+            for var, value in substitutions:
+                line = line.replace(var, value)
+            lines.append(line)
+    return lines
+
+def process_flist_file(flist_path, cva6_repo_dir, target_cfg, processed_flists, files, include_dirs):
+    """Process a Flist file (and the Flists it references), appending to files and include_dirs"""
+    substitutions = flist_substitutions(cva6_repo_dir, target_cfg)
     
-    for line in content.split('\n'):
-        line = line.strip()
-        # Skip comments and empty lines
-        if not line or line.startswith('//'):
-            continue
-        
-        # Extract include directories
-        if line.startswith('+incdir'):
-            incdir = line.replace('+incdir+', '').strip()
-            if incdir:
-                include_dirs.append(incdir)
-            continue
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # Reads of referenced Flists are started as soon as their parent is parsed,
+        # so they overlap with parsing the rest of the parent
+        pending_reads = {}
         
-        # Handle -F references (file lists) - recursively process them
-        if line.startswith('-F'):
-            # Extract the Flist path (after variable replacement, paths are relative to cva6_repo_dir)
-            flist_ref = line[2:].strip()
-            # After variable replacement, paths are relative to cva6_repo_dir
-            # Check if it's already an absolute path (after variable replacement)
-            if os.path.isabs(flist_ref):
-                # Already absolute, use as-is
-                pass
+        def open_flist(path):
+            """Return an iterator over the lines of a Flist not yet processed, or None"""
+            if path in processed_flists:
+                return None
+            processed_flists.add(path)
+            
+            if path in pending_reads:
+                lines = pending_reads.pop(path).result()
             else:
-                # Relative to cva6_repo_dir
-                flist_ref = os.path.join(cva6_repo_dir, flist_ref)
-            # Normalize the path
-            flist_ref = os.path.normpath(flist_ref)
-            # Recursively process the referenced Flist
-            sub_files, sub_incdirs = process_flist_file(flist_ref, cva6_repo_dir, target_cfg, processed_flists)
-            files.extend(sub_files)
-            include_dirs.extend(sub_incdirs)
-            continue
+                lines = read_flist(path, substitutions)
+            if lines is None:
+                print(f"Warning: Flist not found at {path}", file=sys.stderr)
+                return None
+            
+            for line in lines:
+                if line.startswith('-F'):
+                    ref = resolve_flist_ref(line, cva6_repo_dir)
+                    if ref not in processed_flists and ref not in pending_reads:
+                        pending_reads[ref] = executor.submit(read_flist, ref, substitutions)
+            return iter(lines)
+        
+        # Depth-first worklist: a -F reference is expanded in place, so files keep
+        # the order they would have if the Flists were concatenated
+        root = open_flist(normalize_flist_path(flist_path))
+        worklist = [root] if root is not None else []
         
-        # Extract file paths (.sv, .svh, .v)
-        if re.match(r'.*\.(sv|svh|v)$', line):
-            # Normalize path separators - all paths should use forward slashes
-            file_path = line.replace('\\', '/')
+        while worklist:
+            line = next(worklist[-1], None)
+            if line is None:
+                worklist.pop()
+                continue
             
-            # Convert to relative path from integration/ directory
-            # All paths in Flist.cva6 are relative to CVA6_REPO_DIR
-            if not file_path.startswith('../'):
-                # Make it relative from integration/
-                file_path = '../' + file_path
+            # Skip comments and empty lines
+            if not line or line.startswith('//'):
+                continue
             
-            files.append(file_path)
-    
-    return files, include_dirs
+            # Extract include directories
+            if line.startswith('+incdir'):
+                incdir = line.replace('+incdir+', '').strip()
+                if incdir:
+                    include_dirs.append(incdir)
+                continue
+            
+            # Handle -F references (file lists) - descend into them before continuing
+            if line.startswith('-F'):
+                sub_flist = open_flist(resolve_flist_ref(line, cva6_repo_dir))
+                if sub_flist is not None:
+                    worklist.append(sub_flist)
+                continue
+            
+            # Extract file paths (.sv, .svh, .v)
+            if line.endswith(('.sv', '.svh', '.v')):
+                # Normalize path separators - all paths should use forward slashes
+                file_path = line.replace('\\', '/')
+                
+                # Convert to relative path from integration/ directory
+                # All paths in Flist.cva6 are relative to CVA6_REPO_DIR
+                if not file_path.startswith('../'):
+                    # Make it relative from integration/
+                    file_path = '../' + file_path
+                
+                files.append(file_path)
 
 def extract_cva6_files(cva6_repo_dir, target_cfg='cv32a60x', output_file=None):
     """Extract all CVA6 RTL files from Flist.cva6"""
@@ -94,11 +134,18 @@ def extract_cva6_files(cva6_repo_dir, target_cfg='cv32a60x', output_file=None):
         print(f"Error: Flist.cva6 not found at {flist_path}", file=sys.stderr)
         return [], []
     
-    files, include_dirs = process_flist_file(flist_path, cva6_repo_dir, target_cfg)
+    files = []
+    include_dirs = []
+    process_flist_file(flist_path, cva6_repo_dir, target_cfg, set(), files, include_dirs)
+    
+    # Drop entries listed by more than one Flist, keeping the first occurrence
+    files = list(dict.fromkeys(files))
+    include_dirs = list(dict.fromkeys(include_dirs))
     
     if output_file:
-        with open(output_file, 'w') as f:
-            f.write('\n'.join(files))
+        # Binary mode: one write, and no CRLF translation on Windows
+        with open(output_file, 'wb') as f:
+            f.write(b'\n'.join(p.encode('utf-8') for p in files))
         print(f"Extracted {len(files)} CVA6 files to {output_file}", file=sys.stderr)
     
     return files, include_dirs